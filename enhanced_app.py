@@ -5,29 +5,80 @@ Real-time monitoring, connection tracking, and professional web interface
 """
 
 from flask import Flask, render_template, request, jsonify, send_from_directory
-from pymodbus.server import StartTcpServer
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date, quote_etag
+from pymodbus.server import ModbusTcpServer
+from waitress import serve
 from pymodbus import ModbusDeviceIdentification
+from pymodbus.constants import ExcCodes
 from pymodbus.datastore import ModbusSequentialDataBlock, ModbusDeviceContext, ModbusServerContext
-from threading import Thread, Lock
+from threading import Thread, Lock, Event, Timer
+from collections import deque
+from itertools import count
+from array import array
+from types import MappingProxyType
 from datetime import datetime
 import logging
-import json
 import os
 import time
 import asyncio
 import math
 import random
+import hashlib
+import atexit
+import signal
+
+try:
+    import orjson  # optional: C JSON encoder, falls back to Flask's json
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop  # optional: libuv event loop for the Modbus server
+except ImportError:
+    uvloop = None
+
+# pymodbus logs every request/response frame below WARNING; keep that
+# formatting work off the Modbus hot path under sustained polling
+logging.getLogger('pymodbus').setLevel(logging.WARNING)
 
 # Configuration
 MODBUS_ADDRESS = 254
 SERVER_IP = "0.0.0.0"
 SERVER_PORT = 5002
 FLASK_PORT = 5000
+FLASK_THREADS = 8  # worker threads for concurrent HMI polling
+MODBUS_CPU_AFFINITY = None  # e.g. {3} to pin the Modbus thread to one core (Linux)
+STATUS_CACHE_TTL = 0.05  # seconds a serialized /api/status payload may be reused
+CUSTOM_VARIABLES_FLUSH_DELAY = 0.5  # seconds to coalesce custom variable edits before writing
 
 # Expanded register counts for power industry applications
 REGISTER_COUNT = 500  # accommodate all power variables
 
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson
+
+    Keeps Flask's key sorting and fallback encoders, and encodes the
+    int-keyed register dicts without converting them first.
+    """
+    
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2  # the only indent orjson supports
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
+
+# Resolved once at startup from Flask's already-absolute application root
+CUSTOM_VARIABLES_FILE = os.path.join(app.root_path, 'custom_variables.json')
 
 # =============================================================================
 # POWER INDUSTRY REGISTER MAPPING
@@ -466,54 +517,237 @@ POWER_REGISTER_MAP = {
     }
 }
 
+# Give every analog register an explicit scale and unit, so code reading the
+# map can index them directly instead of repeating .get() fallbacks
+for _register_type in ('input_registers', 'holding_registers'):
+    for _config in POWER_REGISTER_MAP[_register_type].values():
+        _config.setdefault('scale', 1)
+        _config.setdefault('unit', '')
+
+# The register map never changes while the server runs, so serialize it once
+# at startup instead of re-encoding every nested entry on each request
+_REGISTER_MAP_JSON = app.json.dumps(POWER_REGISTER_MAP).encode('utf-8')
+_REGISTER_MAP_HEADERS = [
+    ('Content-Type', 'application/json'),
+    ('Content-Length', str(len(_REGISTER_MAP_JSON))),
+    ('ETag', quote_etag(hashlib.sha1(_REGISTER_MAP_JSON).hexdigest())),
+    ('Last-Modified', http_date(os.path.getmtime(__file__))),
+    ('Cache-Control', 'public, max-age=60'),
+]
+
+# Formatted whole-second prefix of the last timestamp, reused by every
+# reading that falls in the same second
+_iso_second = (None, '')
+
+def _isoformat_ns(ts_ns):
+    """Format a time.time_ns() reading like datetime.now().isoformat()"""
+    global _iso_second
+    seconds, nanoseconds = divmod(ts_ns, 1_000_000_000)
+    cached_seconds, prefix = _iso_second
+    if seconds != cached_seconds:
+        prefix = datetime.fromtimestamp(seconds).isoformat()
+        _iso_second = (seconds, prefix)
+    microseconds = nanoseconds // 1000
+    return f'{prefix}.{microseconds:06d}' if microseconds else prefix
+
+def contiguous_runs(values_by_address):
+    """Group {address: value} pairs into (start, [values]) runs of consecutive addresses"""
+    runs = []
+    for address in sorted(values_by_address):
+        if runs and address == runs[-1][0] + len(runs[-1][1]):
+            runs[-1][1].append(values_by_address[address])
+        else:
+            runs.append((address, [values_by_address[address]]))
+    return runs
+
+def _coerce_value(register_type, value):
+    """Convert one write to the value its data block stores
+
+    Raises TypeError or ValueError for values the block cannot hold.
+    """
+    value = int(value)
+    if register_type in ('holding_registers', 'input_registers'):
+        return value & 0xFFFF  # two's complement for negative values
+    if value not in (0, 1):
+        raise ValueError(f'{register_type} values must be 0 or 1')
+    return value
+
+# Storage type per register type: uint8 for bits, uint16 for registers
+_TYPECODES = {
+    'coils': 'B',
+    'discrete_inputs': 'B',
+    'holding_registers': 'H',
+    'input_registers': 'H',
+}
+
+# Flatten each register type's defaults into (start, values) runs once at
+# import, so resets write slices without walking the nested register map.
+# Runs are typed arrays matching the data block storage, so writing one is a
+# straight buffer copy with no per-value int objects kept around.
+_DEFAULT_RUNS = {
+    register_type: [
+        (start, array(_TYPECODES[register_type], values))
+        for start, values in contiguous_runs({addr: config['default'] for addr, config in registers.items()})
+    ]
+    for register_type, registers in POWER_REGISTER_MAP.items()
+}
+
+# The same defaults laid out over the full address space, so a new simulator
+# fills each data block with one copy instead of writing the runs one by one
+_DEFAULT_VALUES = {}
+for _register_type, _runs in _DEFAULT_RUNS.items():
+    _DEFAULT_VALUES[_register_type] = array(_TYPECODES[_register_type], [0]) * REGISTER_COUNT
+    for _start, _values in _runs:
+        _DEFAULT_VALUES[_register_type][_start:_start + len(_values)] = _values
+
+# Name -> address index per register type, for lookups by variable name
+# without scanning the map (names repeat across types, e.g. BKR_SPRING_CHRG)
+_ADDRESS_BY_NAME = {
+    register_type: {config['name']: addr for addr, config in registers.items()}
+    for register_type, registers in POWER_REGISTER_MAP.items()
+}
+
+# (register type, address) -> name, so change tracking names a write with a
+# single dict lookup
+_NAME_BY_ADDRESS = {
+    (register_type, addr): config['name']
+    for register_type, registers in POWER_REGISTER_MAP.items()
+    for addr, config in registers.items()
+}
+
+# Flat per-type rows in address order, so category dumps walk plain tuples
+# instead of re-reading each nested entry: (address, name, scale, unit,
+# description) for analog registers, (address, name, description) for bits
+_CATEGORY_ROWS = {
+    register_type: tuple(
+        (addr, config['name'], config['scale'], config['unit'], config['description'])
+        for addr, config in POWER_REGISTER_MAP[register_type].items()
+    )
+    for register_type in ('input_registers', 'holding_registers')
+}
+_CATEGORY_ROWS.update({
+    register_type: tuple(
+        (addr, config['name'], config['description'])
+        for addr, config in POWER_REGISTER_MAP[register_type].items()
+    )
+    for register_type in ('discrete_inputs', 'coils')
+})
+
+# Everything above (the encoded JSON, ETag and lookup tables) is derived from
+# the map once, so expose it read-only to keep those caches from drifting
+POWER_REGISTER_MAP = MappingProxyType({
+    register_type: MappingProxyType({addr: MappingProxyType(config) for addr, config in registers.items()})
+    for register_type, registers in POWER_REGISTER_MAP.items()
+})
+
 # Global state management
 class SystemState:
+    # No lock: deque appends, next() on a counter and attribute stores are
+    # each atomic under the GIL, so polls never wait on one another. Taking
+    # a number and storing it are two steps, though, so two requests can
+    # store out of order: request_count is approximate and may briefly read
+    # a little low, while the counter itself never hands out a number twice.
     def __init__(self):
-        self.lock = Lock()
-        self.connections = []
+        # (address, time_ns) pairs, capped at the ten get_stats() reports
+        self.connections = deque(maxlen=10)
         self.last_request_time = None
-        self.request_count = 0
+        self.request_count = 0  # last number stored, read by get_stats()
+        self._request_counter = count(1)  # source of truth for numbering
         self.server_start_time = datetime.now()
         self.modbus_running = False
         self.flask_running = False
         
     def add_connection(self, remote_addr):
-        with self.lock:
-            self.connections.append({
-                'address': remote_addr,
-                'timestamp': datetime.now().isoformat(),
-                'request_count': 1
-            })
-            self.request_count += 1
-            self.last_request_time = datetime.now()
+        # Record raw clock readings; get_stats() formats the few it reports
+        now = time.time_ns()
+        self.connections.append((remote_addr, now))
+        self.request_count = next(self._request_counter)
+        self.last_request_time = now
     
     def get_stats(self):
-        with self.lock:
-            uptime = (datetime.now() - self.server_start_time).total_seconds()
-            return {
-                'uptime_seconds': uptime,
-                'total_requests': self.request_count,
-                'recent_connections': self.connections[-10:],
-                'last_request': self.last_request_time.isoformat() if self.last_request_time else None,
-                'modbus_running': self.modbus_running,
-                'flask_running': self.flask_running
-            }
+        uptime = (datetime.now() - self.server_start_time).total_seconds()
+        # list() copies the deque in one step, so a concurrent append can't
+        # interrupt the iteration below
+        connections = list(self.connections)
+        last_request_time = self.last_request_time
+        return {
+            'uptime_seconds': uptime,
+            'total_requests': self.request_count,
+            'recent_connections': [
+                {'address': address, 'timestamp': _isoformat_ns(ts_ns), 'request_count': 1}
+                for address, ts_ns in connections
+            ],
+            'last_request': _isoformat_ns(last_request_time) if last_request_time else None,
+            'modbus_running': self.modbus_running,
+            'flask_running': self.flask_running
+        }
 
 state = SystemState()
 
+class PackedDataBlock(ModbusSequentialDataBlock):
+    """Sequential data block stored in a typed array instead of a list of ints
+
+    Registers live in one contiguous uint16 buffer ('H') and bits in a uint8
+    buffer ('B'), so the store holds no per-value Python int objects and
+    slice writes are plain memory copies.
+    """
+    
+    def __init__(self, address, values, typecode='H'):
+        super().__init__(address, values)
+        self.values = array(typecode, values)
+    
+    def default(self, count, value=False):
+        self.default_value = value
+        self.values = array(self.values.typecode, [value] * count)
+        self.address = 0x00
+    
+    def reset(self):
+        self.values = array(self.values.typecode, [self.default_value] * len(self.values))
+    
+    def getValues(self, address, count=1):
+        values = super().getValues(address, count)
+        return values.tolist() if isinstance(values, array) else values
+    
+    def exchange(self, address, value):
+        """Write a single value and return the one it replaced"""
+        index = address - self.address
+        if index < 0:
+            raise IndexError(f'address {address} out of range')
+        old_value = self.values[index]
+        self.values[index] = value
+        return old_value
+    
+    def setValues(self, address, values):
+        if not isinstance(values, (list, array)):
+            values = [values]
+        start = address - self.address
+        if start < 0 or len(self.values) < start + len(values):
+            return ExcCodes.ILLEGAL_ADDRESS
+        if not isinstance(values, array) or values.typecode != self.values.typecode:
+            values = array(self.values.typecode, values)
+        self.values[start:start + len(values)] = values
+        return None
+
 class IEDSimulator:
     def __init__(self):
-        # Initialize data blocks with expanded size
-        self.coils = ModbusSequentialDataBlock(0, [0] * REGISTER_COUNT)
-        self.discrete_inputs = ModbusSequentialDataBlock(0, [0] * REGISTER_COUNT)
-        self.holding_registers = ModbusSequentialDataBlock(0, [0] * REGISTER_COUNT)
-        self.input_registers = ModbusSequentialDataBlock(0, [0] * REGISTER_COUNT)
-        
-        # Initialize with power industry default values
-        self._initialize_power_defaults()
+        # Initialize data blocks with expanded size, pre-filled with the
+        # power industry default values
+        self.coils = PackedDataBlock(0, _DEFAULT_VALUES['coils'], typecode=_TYPECODES['coils'])
+        self.discrete_inputs = PackedDataBlock(0, _DEFAULT_VALUES['discrete_inputs'], typecode=_TYPECODES['discrete_inputs'])
+        self.holding_registers = PackedDataBlock(0, _DEFAULT_VALUES['holding_registers'], typecode=_TYPECODES['holding_registers'])
+        self.input_registers = PackedDataBlock(0, _DEFAULT_VALUES['input_registers'], typecode=_TYPECODES['input_registers'])
+        self.blocks = {
+            'coils': self.coils,
+            'discrete_inputs': self.discrete_inputs,
+            'holding_registers': self.holding_registers,
+            'input_registers': self.input_registers,
+        }
         
         # Custom variables storage
         self.custom_variables = {}
+        self._custom_variables_stat = None  # (mtime_ns, size) of the last file read or written
+        self._custom_variables_lock = Lock()
+        self._custom_variables_timer = None
         self.load_custom_variables()
         
         # Create device context
@@ -529,9 +763,30 @@ class IEDSimulator:
             single=False
         )
         
-        # Change tracking
-        self.last_changes = []
-        self.lock = Lock()
+        # Change tracking, with a lock and a log per register bank so writes
+        # to different banks never wait on each other
+        self.locks = {register_type: Lock() for register_type in self.blocks}
+        self.last_changes = {register_type: deque(maxlen=100) for register_type in self.blocks}
+        # Sequence numbers stamped on each change, for /api/changes_since.
+        # change_seq is the highest number whose record is already in its log.
+        self.change_seq = 0
+        self._change_counter = count(1)
+        self._change_seq_lock = Lock()
+        # Highest seq pushed out of a full bank log, so delta polls can tell
+        # when records they never saw were dropped
+        self.dropped_seq = 0
+        
+        # Serialized /api/status payload, reused until it expires or a write
+        # through the simulator marks it dirty. Modbus client writes bypass
+        # the setters, so the TTL bounds how stale those can appear.
+        self.status_cache = None
+        self.status_cache_time = 0.0
+        self.status_dirty = True
+        self.status_lock = Lock()
+        
+        # Formatted recent change list, rebuilt only after a new change
+        self.recent_changes_cache = []
+        self.changes_dirty = False
         
         # Simulation state
         self.simulation_running = False
@@ -539,155 +794,279 @@ class IEDSimulator:
     
     def _initialize_power_defaults(self):
         """Initialize all registers with power industry default values"""
-        # Initialize input registers
-        for addr, config in POWER_REGISTER_MAP['input_registers'].items():
-            self.input_registers.setValues(addr, [config['default']])
-        
-        # Initialize holding registers
-        for addr, config in POWER_REGISTER_MAP['holding_registers'].items():
-            self.holding_registers.setValues(addr, [config['default']])
-        
-        # Initialize discrete inputs
-        for addr, config in POWER_REGISTER_MAP['discrete_inputs'].items():
-            self.discrete_inputs.setValues(addr, [config['default']])
-        
-        # Initialize coils
-        for addr, config in POWER_REGISTER_MAP['coils'].items():
-            self.coils.setValues(addr, [config['default']])
+        for register_type, block in self.blocks.items():
+            # One setValues per block of consecutive addresses instead of per register
+            for start, values in _DEFAULT_RUNS[register_type]:
+                block.setValues(start, values)
+        self.status_dirty = True
     
     def load_custom_variables(self):
         """Load custom variables from config file"""
         try:
-            if os.path.exists('custom_variables.json'):
-                with open('custom_variables.json', 'r') as f:
-                    self.custom_variables = json.load(f)
+            # One binary read and a single decode pass (orjson when
+            # available), skipping the buffered text layer of json.load().
+            # Opening directly replaces the exists() check and its race.
+            with open(CUSTOM_VARIABLES_FILE, 'rb') as f:
+                st = os.fstat(f.fileno())
+                # Recorded before parsing, so a broken hand edit is reported
+                # once instead of being re-read on every refresh
+                self._custom_variables_stat = (st.st_mtime_ns, st.st_size)
+                self.custom_variables = app.json.loads(f.read())
+        except FileNotFoundError:
+            pass
         except Exception as e:
+            # Keep what is already loaded ({} at startup) rather than
+            # dropping every variable over an unreadable file
             print(f"Error loading custom variables: {e}")
-            self.custom_variables = {}
     
     def save_custom_variables(self):
-        """Save custom variables to config file"""
+        """Save custom variables to config file
+
+        The write happens on a timer, so a burst of edits results in a
+        single write a moment later instead of one per request.
+        """
+        with self._custom_variables_lock:
+            if self._custom_variables_timer is None:
+                self._custom_variables_timer = Timer(CUSTOM_VARIABLES_FLUSH_DELAY, self.flush_custom_variables)
+                self._custom_variables_timer.daemon = True
+                self._custom_variables_timer.start()
+    
+    def flush_custom_variables(self):
+        """Write pending custom variable edits to the config file now"""
+        with self._custom_variables_lock:
+            if self._custom_variables_timer is None:
+                return
+            self._custom_variables_timer.cancel()
+            self._custom_variables_timer = None
+            # Write a temp file and rename it over the original, so readers
+            # and crashes never see a half-written config
+            tmp_path = CUSTOM_VARIABLES_FILE + '.tmp'
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(app.json.dumps(self.custom_variables, indent=2, sort_keys=False))
+                os.replace(tmp_path, CUSTOM_VARIABLES_FILE)
+                st = os.stat(CUSTOM_VARIABLES_FILE)
+                self._custom_variables_stat = (st.st_mtime_ns, st.st_size)
+            except Exception as e:
+                print(f"Error saving custom variables: {e}")
+    
+    def refresh_custom_variables(self):
+        """Reload custom variables only if the file was edited on disk"""
+        if self._custom_variables_timer is not None:
+            return  # in-memory edits are newer than the file until flushed
+        # One stat call; size catches edits that land within the same mtime tick
         try:
-            with open('custom_variables.json', 'w') as f:
-                json.dump(self.custom_variables, f, indent=2)
-        except Exception as e:
-            print(f"Error saving custom variables: {e}")
+            st = os.stat(CUSTOM_VARIABLES_FILE)
+        except OSError:
+            return
+        if (st.st_mtime_ns, st.st_size) != self._custom_variables_stat:
+            self.load_custom_variables()
     
     def track_change(self, register_type, address, old_value, new_value):
-        """Track changes to registers"""
-        with self.lock:
-            # Get the variable name if it exists in the register map
-            var_name = None
-            if register_type in POWER_REGISTER_MAP:
-                reg_map = POWER_REGISTER_MAP[register_type]
-                if address in reg_map:
-                    var_name = reg_map[address]['name']
-            
-            change = {
-                'timestamp': datetime.now().isoformat(),
-                'type': register_type,
-                'address': address,
-                'name': var_name,
-                'old_value': old_value,
-                'new_value': new_value
-            }
-            self.last_changes.append(change)
-            if len(self.last_changes) > 100:
-                self.last_changes.pop(0)
+        """Track changes to registers (caller holds self.locks[register_type])"""
+        self._append_change(register_type, address, _NAME_BY_ADDRESS.get((register_type, address)), old_value, new_value)
+        # Flags are raised after the write so a reader that clears them
+        # before reading can never cache a view missing this change
+        self.status_dirty = True
+        self.changes_dirty = True
+    
+    def _append_change(self, register_type, address, name, old_value, new_value):
+        """Number a change record and add it to its bank's log"""
+        # Each bank has its own write lock, so numbering and appending share
+        # one small lock of their own. Records then reach the logs in seq
+        # order, and change_seq only moves once its record is readable.
+        with self._change_seq_lock:
+            seq = next(self._change_counter)
+            bank_changes = self.last_changes[register_type]
+            if len(bank_changes) == bank_changes.maxlen:
+                self.dropped_seq = bank_changes[0][0]
+            # Keep the raw clock reading; the timestamp is only formatted
+            # when the change log is actually read
+            bank_changes.append(
+                (seq, time.time_ns(), register_type, address, name, old_value, new_value)
+            )
+            self.change_seq = seq
     
     def get_coil(self, address):
         values = self.coils.getValues(address, 1)
         return values[0]
     
     def set_coil(self, address, value):
-        old_value = self.get_coil(address)
-        self.coils.setValues(address, [value])
-        self.track_change('coils', address, old_value, value)
+        with self.locks['coils']:
+            old_value = self.coils.exchange(address, value)
+            self.track_change('coils', address, old_value, value)
     
     def get_discrete_input(self, address):
         values = self.discrete_inputs.getValues(address, 1)
         return values[0]
     
     def set_discrete_input(self, address, value):
-        old_value = self.get_discrete_input(address)
-        self.discrete_inputs.setValues(address, [value])
-        self.track_change('discrete_inputs', address, old_value, value)
+        with self.locks['discrete_inputs']:
+            old_value = self.discrete_inputs.exchange(address, value)
+            self.track_change('discrete_inputs', address, old_value, value)
     
     def get_holding_register(self, address):
         values = self.holding_registers.getValues(address, 1)
         return values[0]
     
     def set_holding_register(self, address, value):
-        old_value = self.get_holding_register(address)
-        if value < 0:
-            value = 0xFFFF + value + 1
-        self.holding_registers.setValues(address, [value])
-        self.track_change('holding_registers', address, old_value, value)
+        value &= 0xFFFF  # two's complement for negative values
+        with self.locks['holding_registers']:
+            old_value = self.holding_registers.exchange(address, value)
+            self.track_change('holding_registers', address, old_value, value)
     
     def get_input_register(self, address):
         values = self.input_registers.getValues(address, 1)
         return values[0]
     
     def set_input_register(self, address, value):
-        old_value = self.get_input_register(address)
-        if value < 0:
-            value = 0xFFFF + value + 1
-        self.input_registers.setValues(address, [value])
-        self.track_change('input_registers', address, old_value, value)
+        value &= 0xFFFF  # two's complement for negative values
+        with self.locks['input_registers']:
+            old_value = self.input_registers.exchange(address, value)
+            self.track_change('input_registers', address, old_value, value)
+    
+    def bulk_set(self, block_name, items, log_each=False):
+        """Write many {address: value} pairs with one setValues per contiguous run
+
+        log_each records every address with its old value instead of one batch record.
+        """
+        # A list is an exported bank, starting at address 0
+        pairs = enumerate(items) if isinstance(items, list) else items.items()
+        values_by_address = {int(addr): _coerce_value(block_name, val) for addr, val in pairs}
+        if not values_by_address:
+            return 0
+        first, last = min(values_by_address), max(values_by_address)
+        # Reject the batch up front so a bad address can't leave it half written
+        if first < 0 or last >= REGISTER_COUNT:
+            raise ValueError(f'{block_name} address out of range (0-{REGISTER_COUNT - 1})')
+        
+        block = self.blocks[block_name]
+        with self.locks[block_name]:
+            for start, values in contiguous_runs(values_by_address):
+                if log_each:
+                    old_values = block.getValues(start, len(values))
+                block.setValues(start, values)
+                if log_each:
+                    for address, old_value, value in zip(range(start, start + len(values)), old_values, values):
+                        self.track_change(block_name, address, old_value, value)
+            if not log_each:
+                self._append_change(block_name, f'{first}-{last}', None, None, f'{len(values_by_address)} values')
+        self.status_dirty = True
+        self.changes_dirty = True
+        return len(values_by_address)
+    
+    def read_block(self, register_type, start, count):
+        """Read count consecutive values of one register type with a single slice"""
+        return self.blocks[register_type].getValues(start, count)
+    
+    def get_all_values(self, register_type):
+        """Read a whole register bank with one slice instead of per-address calls"""
+        return self.blocks[register_type].getValues(0, REGISTER_COUNT)
+    
+    def snapshot(self):
+        """Current values of every register bank, one slice read per bank"""
+        return {register_type: self.get_all_values(register_type) for register_type in self.blocks}
     
     def get_recent_changes(self):
-        with self.lock:
-            return self.last_changes[-50:]
+        if not self.changes_dirty:
+            return self.recent_changes_cache
+        self.changes_dirty = False
+        self.recent_changes_cache = [self._format_change(change) for change in self._merged_changes()[-50:]]
+        return self.recent_changes_cache
+    
+    def get_changes_since(self, seq, upto):
+        """Changes numbered after seq and up to upto, oldest first
+
+        Pass a change_seq read before the call as upto. Every record up to it
+        is already logged, so a poller that resumes from upto misses nothing.
+        """
+        return [self._format_change(change) for change in self._merged_changes() if seq < change[0] <= upto]
+    
+    def _merged_changes(self):
+        """All retained change records from every bank, in write order"""
+        # Copying a deque is a single atomic step, so reading the logs never
+        # waits on the per-bank write locks
+        changes = []
+        for bank_changes in self.last_changes.values():
+            changes.extend(list(bank_changes))
+        changes.sort(key=lambda change: change[0])
+        return changes
+    
+    @staticmethod
+    def _format_change(change):
+        seq, ts_ns, register_type, address, name, old_value, new_value = change
+        return {
+            'seq': seq,
+            'timestamp': _isoformat_ns(ts_ns),
+            'type': register_type,
+            'address': address,
+            'name': name,
+            'old_value': old_value,
+            'new_value': new_value
+        }
     
     def get_register_map(self):
         """Return the power register map for API access"""
-        return POWER_REGISTER_MAP
+        # A plain-dict copy: the frozen MappingProxyType map is not JSON serializable
+        return {
+            register_type: {addr: dict(config) for addr, config in registers.items()}
+            for register_type, registers in POWER_REGISTER_MAP.items()
+        }
     
     def get_all_values_by_category(self, category):
         """Get all values for a specific category with metadata"""
         result = {}
-        if category == 'input_registers':
-            for addr, config in POWER_REGISTER_MAP['input_registers'].items():
-                raw_value = self.get_input_register(addr)
-                scaled_value = raw_value * config.get('scale', 1)
-                result[config['name']] = {
-                    'address': addr,
-                    'raw_value': raw_value,
-                    'scaled_value': scaled_value,
-                    'unit': config.get('unit', ''),
-                    'description': config['description']
-                }
-        elif category == 'holding_registers':
-            for addr, config in POWER_REGISTER_MAP['holding_registers'].items():
-                raw_value = self.get_holding_register(addr)
-                scaled_value = raw_value * config.get('scale', 1)
-                result[config['name']] = {
+        if category in ('input_registers', 'holding_registers'):
+            # Index the block's typed array in place rather than copying the
+            # bank out into a list; only the mapped addresses are read
+            values = self.blocks[category].values
+            for addr, name, scale, unit, description in _CATEGORY_ROWS[category]:
+                raw_value = values[addr]
+                result[name] = {
                     'address': addr,
                     'raw_value': raw_value,
-                    'scaled_value': scaled_value,
-                    'unit': config.get('unit', ''),
-                    'description': config['description']
-                }
-        elif category == 'discrete_inputs':
-            for addr, config in POWER_REGISTER_MAP['discrete_inputs'].items():
-                result[config['name']] = {
-                    'address': addr,
-                    'value': self.get_discrete_input(addr),
-                    'description': config['description']
+                    'scaled_value': raw_value * scale,
+                    'unit': unit,
+                    'description': description
                 }
-        elif category == 'coils':
-            for addr, config in POWER_REGISTER_MAP['coils'].items():
-                result[config['name']] = {
+        elif category in ('discrete_inputs', 'coils'):
+            values = self.blocks[category].values
+            for addr, name, description in _CATEGORY_ROWS[category]:
+                result[name] = {
                     'address': addr,
-                    'value': self.get_coil(addr),
-                    'description': config['description']
+                    'value': values[addr],
+                    'description': description
                 }
         return result
 
 # Initialize simulator
 simulator = IEDSimulator()
+atexit.register(simulator.flush_custom_variables)
 server_context = simulator.server_context
 
+# Register type (as sent by the HMI) -> simulator getter
+_GETTERS = {
+    'coil': simulator.get_coil,
+    'discrete_input': simulator.get_discrete_input,
+    'holding_register': simulator.get_holding_register,
+    'input_register': simulator.get_input_register,
+}
+
+# Register type (as sent by the HMI) -> simulator setter
+_SETTERS = {
+    'coil': simulator.set_coil,
+    'discrete_input': simulator.set_discrete_input,
+    'holding_register': simulator.set_holding_register,
+    'input_register': simulator.set_input_register,
+}
+
+def _invalid_address(address):
+    """Return a 400 response for addresses outside the data blocks, else None"""
+    # type() rather than isinstance(), so JSON true/false are not taken as 1/0
+    if type(address) is int and 0 <= address < REGISTER_COUNT:
+        return None
+    return jsonify({'success': False, 'message': f'Address out of range (0-{REGISTER_COUNT - 1})'}), 400
+
 # Flask Routes
 @app.route('/')
 def index():
@@ -701,69 +1080,124 @@ def simulation_page():
 def variables_page():
     return render_template('variables.html')
 
+# The Modbus endpoint details never change at runtime, so that part of the
+# system status payload is encoded once and spliced into each response
+_MODBUS_STATUS_JSON = app.json.dumps({
+    'address': MODBUS_ADDRESS,
+    'ip': SERVER_IP,
+    'port': SERVER_PORT,
+    'protocol': 'Modbus TCP'
+})
+
 @app.route('/api/system_status')
 def system_status():
     """Get comprehensive system status"""
     stats = state.get_stats()
-    return jsonify({
-        'system': stats,
-        'modbus': {
-            'address': MODBUS_ADDRESS,
-            'ip': SERVER_IP,
-            'port': SERVER_PORT,
-            'protocol': 'Modbus TCP'
-        },
-        'register_count': REGISTER_COUNT,
-        'recent_changes': simulator.get_recent_changes()
-    })
+    body = (
+        f'{{"system":{app.json.dumps(stats)},'
+        f'"modbus":{_MODBUS_STATUS_JSON},'
+        f'"register_count":{REGISTER_COUNT},'
+        f'"recent_changes":{app.json.dumps(simulator.get_recent_changes())}}}'
+    )
+    return app.response_class(body, mimetype='application/json')
 
 @app.route('/api/status')
 def get_status():
     """Get current status of common registers"""
     state.add_connection(request.remote_addr)
     
-    # Return a subset of commonly monitored values
-    return jsonify({
+    # Serve the last payload while it is fresh and nothing was written since
+    if simulator.status_dirty or time.monotonic() - simulator.status_cache_time >= STATUS_CACHE_TTL:
+        # Single flight: one poller rebuilds while the others keep serving
+        # the previous payload, so a burst of polls costs one rebuild. Only
+        # the very first request, with nothing cached yet, waits for it.
+        if simulator.status_lock.acquire(blocking=simulator.status_cache is None):
+            try:
+                now = time.monotonic()
+                if simulator.status_dirty or now - simulator.status_cache_time >= STATUS_CACHE_TTL:
+                    # Clear the flag before reading so a write during the
+                    # rebuild leaves it set and forces another rebuild
+                    simulator.status_dirty = False
+                    status = _build_status()
+                    simulator.status_cache = (status, app.json.dumps(status).encode('utf-8'))
+                    simulator.status_cache_time = now
+            finally:
+                simulator.status_lock.release()
+    status, body = simulator.status_cache
+    
+    # ?fields=voltage,breaker limits the response to the groups a client shows
+    fields = request.args.get('fields')
+    if fields:
+        return jsonify({field: status[field] for field in fields.split(',') if field in status})
+    return app.response_class(body, mimetype='application/json')
+
+def _build_status():
+    """Collect the subset of commonly monitored values served by /api/status"""
+    # Read each cluster of commonly monitored registers with one range read
+    voltage = simulator.read_block('input_registers', 0, 6)
+    current = simulator.read_block('input_registers', 20, 4)
+    power = simulator.read_block('input_registers', 43, 13)
+    frequency = simulator.read_block('input_registers', 70, 1)
+    breaker = simulator.read_block('discrete_inputs', 0, 3)
+    transformer = simulator.read_block('input_registers', 100, 7)
+    
+    return {
         'voltage': {
-            'V_L1_N': simulator.get_input_register(0) * 0.1,
-            'V_L2_N': simulator.get_input_register(1) * 0.1,
-            'V_L3_N': simulator.get_input_register(2) * 0.1,
-            'V_L1_L2': simulator.get_input_register(3) * 0.1,
-            'V_L2_L3': simulator.get_input_register(4) * 0.1,
-            'V_L3_L1': simulator.get_input_register(5) * 0.1,
+            'V_L1_N': voltage[0] * 0.1,
+            'V_L2_N': voltage[1] * 0.1,
+            'V_L3_N': voltage[2] * 0.1,
+            'V_L1_L2': voltage[3] * 0.1,
+            'V_L2_L3': voltage[4] * 0.1,
+            'V_L3_L1': voltage[5] * 0.1,
         },
         'current': {
-            'I_L1': simulator.get_input_register(20) * 0.01,
-            'I_L2': simulator.get_input_register(21) * 0.01,
-            'I_L3': simulator.get_input_register(22) * 0.01,
-            'I_N': simulator.get_input_register(23) * 0.01,
+            'I_L1': current[0] * 0.01,
+            'I_L2': current[1] * 0.01,
+            'I_L3': current[2] * 0.01,
+            'I_N': current[3] * 0.01,
         },
         'power': {
-            'P_TOTAL': simulator.get_input_register(43) * 0.1,
-            'Q_TOTAL': simulator.get_input_register(47) * 0.1,
-            'S_TOTAL': simulator.get_input_register(51) * 0.1,
-            'PF_TOTAL': simulator.get_input_register(55) * 0.001,
+            'P_TOTAL': power[0] * 0.1,
+            'Q_TOTAL': power[4] * 0.1,
+            'S_TOTAL': power[8] * 0.1,
+            'PF_TOTAL': power[12] * 0.001,
         },
         'frequency': {
-            'FREQ': simulator.get_input_register(70) * 0.01,
+            'FREQ': frequency[0] * 0.01,
         },
         'breaker': {
-            'BKR_52A': simulator.get_discrete_input(0),
-            'BKR_52B': simulator.get_discrete_input(1),
-            'BKR_READY': simulator.get_discrete_input(2),
+            'BKR_52A': breaker[0],
+            'BKR_52B': breaker[1],
+            'BKR_READY': breaker[2],
         },
         'transformer': {
-            'XFMR_OIL_TEMP': simulator.get_input_register(100) * 0.1,
-            'XFMR_WNDG_TEMP': simulator.get_input_register(101) * 0.1,
-            'XFMR_LOAD_PCT': simulator.get_input_register(103) * 0.1,
-            'XFMR_TAP_POS': simulator.get_input_register(106),
+            'XFMR_OIL_TEMP': transformer[0] * 0.1,
+            'XFMR_WNDG_TEMP': transformer[1] * 0.1,
+            'XFMR_LOAD_PCT': transformer[3] * 0.1,
+            'XFMR_TAP_POS': transformer[6],
         }
+    }
+
+@app.route('/api/changes_since/<int:seq>')
+def changes_since(seq):
+    """Get the changes recorded after sequence number seq"""
+    latest = simulator.change_seq
+    changes = simulator.get_changes_since(seq, latest)
+    # Checked after the logs were copied, so a record dropped before the
+    # copy is always flagged; the client should then resync from /api/status
+    truncated = simulator.dropped_seq > seq
+    return jsonify({
+        'seq': latest,
+        'changes': changes,
+        'truncated': truncated
     })
 
 @app.route('/api/register_map')
 def get_register_map():
     """Get the complete power industry register map"""
-    return jsonify(POWER_REGISTER_MAP)
+    response = app.response_class(_REGISTER_MAP_JSON, headers=_REGISTER_MAP_HEADERS)
+    # Answer repeat polls with 304 Not Modified when the client's copy is current
+    return response.make_conditional(request)
 
 @app.route('/api/category/<category>')
 def get_category_values(category):
@@ -780,53 +1214,79 @@ def get_register():
     reg_type = data.get('type')
     address = data.get('address', 0)
     
-    value = None
-    if reg_type == 'coil':
-        value = simulator.get_coil(address)
-    elif reg_type == 'discrete_input':
-        value = simulator.get_discrete_input(address)
-    elif reg_type == 'holding_register':
-        value = simulator.get_holding_register(address)
-    elif reg_type == 'input_register':
-        value = simulator.get_input_register(address)
+    getter = _GETTERS.get(reg_type)
+    if getter is None:
+        return jsonify({'success': False, 'message': 'Invalid register type'}), 400
+    
+    # Allow addressing a mapped variable by name, e.g. {"type": "input_register", "name": "V_L1_N"}
+    if 'name' in data:
+        names = _ADDRESS_BY_NAME[f'{reg_type}s']
+        if data['name'] not in names:
+            return jsonify({'success': False, 'message': 'Variable not found'}), 404
+        address = names[data['name']]
+    
+    error = _invalid_address(address)
+    if error:
+        return error
     
-    return jsonify({'success': True, 'value': value})
+    return jsonify({'success': True, 'value': getter(address)})
 
-@app.route('/api/set_coil', methods=['POST'])
-def set_coil():
+@app.route('/api/set/<reg_type>', methods=['POST'])
+def set_register(reg_type):
+    """Set one value, or several at once with {"writes": [[address, value], ...]}"""
+    setter = _SETTERS.get(reg_type)
+    if setter is None:
+        return jsonify({'success': False, 'message': 'Invalid register type'}), 400
     data = request.json
+    
+    if 'writes' in data:
+        # Batched writes go through bulk_set: one request, one lock, one
+        # setValues per contiguous run, still logged per address. A repeated
+        # address keeps its last value, so count is the addresses written.
+        try:
+            # Same address rule as single writes, checked on every pair before
+            # dict() can merge true into 1; bulk_set's int() on keys is only
+            # for import_config's {"0": value} objects
+            for address, _ in data['writes']:
+                error = _invalid_address(address)
+                if error:
+                    return error
+            written = simulator.bulk_set(f'{reg_type}s', dict(data['writes']), log_each=True)
+        except (TypeError, ValueError, OverflowError) as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        return jsonify({'success': True, 'count': written})
+    
     address = data.get('address', 0)
-    value = data.get('value', 0)
-    simulator.set_coil(address, value)
+    error = _invalid_address(address)
+    if error:
+        return error
+    try:
+        value = _coerce_value(f'{reg_type}s', data.get('value', 0))
+        setter(address, value)
+    except (TypeError, ValueError, OverflowError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     return jsonify({'success': True, 'address': address, 'value': value})
 
+@app.route('/api/set_coil', methods=['POST'])
+def set_coil():
+    return set_register('coil')
+
 @app.route('/api/set_discrete_input', methods=['POST'])
 def set_discrete_input():
-    data = request.json
-    address = data.get('address', 0)
-    value = data.get('value', 0)
-    simulator.set_discrete_input(address, value)
-    return jsonify({'success': True, 'address': address, 'value': value})
+    return set_register('discrete_input')
 
 @app.route('/api/set_holding_register', methods=['POST'])
 def set_holding_register():
-    data = request.json
-    address = data.get('address', 0)
-    value = data.get('value', 0)
-    simulator.set_holding_register(address, value)
-    return jsonify({'success': True, 'address': address, 'value': value})
+    return set_register('holding_register')
 
 @app.route('/api/set_input_register', methods=['POST'])
 def set_input_register():
-    data = request.json
-    address = data.get('address', 0)
-    value = data.get('value', 0)
-    simulator.set_input_register(address, value)
-    return jsonify({'success': True, 'address': address, 'value': value})
+    return set_register('input_register')
 
 @app.route('/api/custom_variables', methods=['GET'])
 def get_custom_variables():
     """Get all custom variables"""
+    simulator.refresh_custom_variables()
     return jsonify(simulator.custom_variables)
 
 @app.route('/api/custom_variables', methods=['POST'])
@@ -854,19 +1314,15 @@ def delete_custom_variable(var_name):
 def export_config():
     """Export current configuration"""
     config = {
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': _isoformat_ns(time.time_ns()),
         'modbus_config': {
             'address': MODBUS_ADDRESS,
             'ip': SERVER_IP,
             'port': SERVER_PORT
         },
         'custom_variables': simulator.custom_variables,
-        'current_values': {
-            'coils': {i: simulator.get_coil(i) for i in range(REGISTER_COUNT)},
-            'discrete_inputs': {i: simulator.get_discrete_input(i) for i in range(REGISTER_COUNT)},
-            'holding_registers': {i: simulator.get_holding_register(i) for i in range(REGISTER_COUNT)},
-            'input_registers': {i: simulator.get_input_register(i) for i in range(REGISTER_COUNT)}
-        }
+        # Whole banks as arrays indexed by address
+        'current_values': simulator.snapshot()
     }
     return jsonify(config)
 
@@ -885,25 +1341,10 @@ def import_config():
         if 'current_values' in config:
             values = config['current_values']
             
-            # Import coils
-            if 'coils' in values:
-                for addr, val in values['coils'].items():
-                    simulator.set_coil(int(addr), val)
-            
-            # Import discrete inputs
-            if 'discrete_inputs' in values:
-                for addr, val in values['discrete_inputs'].items():
-                    simulator.set_discrete_input(int(addr), val)
-            
-            # Import holding registers
-            if 'holding_registers' in values:
-                for addr, val in values['holding_registers'].items():
-                    simulator.set_holding_register(int(addr), val)
-            
-            # Import input registers
-            if 'input_registers' in values:
-                for addr, val in values['input_registers'].items():
-                    simulator.set_input_register(int(addr), val)
+            # One batched write per register bank
+            for block_name in ('coils', 'discrete_inputs', 'holding_registers', 'input_registers'):
+                if block_name in values:
+                    simulator.bulk_set(block_name, values[block_name])
         
         return jsonify({'success': True, 'message': 'Configuration imported successfully'})
     except Exception as e:
@@ -918,6 +1359,21 @@ def reset_defaults():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
+# Set by the Modbus thread once its listening socket is bound
+modbus_ready = Event()
+
+async def serve_modbus(identity):
+    """Serve Modbus TCP until shutdown, signalling modbus_ready once listening"""
+    server = ModbusTcpServer(
+        context=server_context,
+        identity=identity,
+        address=(SERVER_IP, SERVER_PORT)
+    )
+    await server.serve_forever(background=True)
+    state.modbus_running = True
+    modbus_ready.set()
+    await server.serving
+
 def run_modbus_server():
     """Run Modbus TCP server"""
     logging.basicConfig()
@@ -932,62 +1388,80 @@ def run_modbus_server():
     identity.ModelName = 'Raspberry Pi Power Simulator'
     identity.MajorMinorRevision = '3.0.0'
     
-    state.modbus_running = True
+    if MODBUS_CPU_AFFINITY:
+        # On Linux pid 0 means the calling thread, so only the Modbus server
+        # is pinned; keeping it on one core avoids migrations and tick jitter
+        try:
+            os.sched_setaffinity(0, MODBUS_CPU_AFFINITY)
+            print(f"[MODBUS] Pinned to CPU {sorted(MODBUS_CPU_AFFINITY)}")
+        except (AttributeError, OSError) as e:
+            print(f"[MODBUS] Could not set CPU affinity: {e}")
+    
     print(f"[MODBUS] Starting Modbus TCP Server on {SERVER_IP}:{SERVER_PORT}")
     print(f"[MODBUS] Modbus Address: {MODBUS_ADDRESS}")
     print(f"[MODBUS] Register Count: {REGISTER_COUNT} per type")
     print(f"[MODBUS] Waiting for connections...")
     
-    # Run the async server in a new event loop
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(
-        StartTcpServer(
-            context=server_context,
-            identity=identity,
-            address=(SERVER_IP, SERVER_PORT)
-        )
-    )
+    # Serve every Modbus client from this thread's single event loop.
+    # StartTcpServer would spin up its own loop via asyncio.run() and block
+    # before run_until_complete() ever saw a coroutine.
+    if uvloop is not None:
+        uvloop.run(serve_modbus(identity))
+    else:
+        asyncio.run(serve_modbus(identity))
 
 def run_flask_app():
     """Run Flask web server"""
     state.flask_running = True
     print(f"[FLASK] Starting Web Interface on http://0.0.0.0:{FLASK_PORT}")
     print(f"[FLASK] Access the interface at http://<your-pi-ip>:{FLASK_PORT}")
-    app.run(host='0.0.0.0', port=FLASK_PORT, debug=False, use_reloader=False)
+    # Werkzeug's dev server handles one request at a time; waitress serves
+    # dashboard pollers concurrently from a thread pool
+    serve(app, host='0.0.0.0', port=FLASK_PORT, threads=FLASK_THREADS, connection_limit=200)
+
+def _handle_sigterm(signum, frame):
+    """Flush pending custom variable edits, then exit"""
+    # systemd stops the service with SIGTERM, which skips atexit handlers,
+    # so the debounced write would otherwise be dropped
+    simulator.flush_custom_variables()
+    raise SystemExit(0)
 
 def print_startup_banner():
     """Print startup information"""
-    print("=" * 70)
-    print("POWER INDUSTRY IED SIMULATOR - Professional Edition v3.0")
-    print("=" * 70)
-    print(f"Start Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"Modbus TCP: {SERVER_IP}:{SERVER_PORT} (Unit ID: {MODBUS_ADDRESS})")
-    print(f"Web Interface: http://0.0.0.0:{FLASK_PORT}")
-    print(f"Register Count: {REGISTER_COUNT} per type")
-    print("-" * 70)
-    print("Configured Power Industry Variables:")
-    print(f"  - Input Registers: {len(POWER_REGISTER_MAP['input_registers'])} variables")
-    print(f"  - Holding Registers: {len(POWER_REGISTER_MAP['holding_registers'])} variables")
-    print(f"  - Discrete Inputs: {len(POWER_REGISTER_MAP['discrete_inputs'])} variables")
-    print(f"  - Coils: {len(POWER_REGISTER_MAP['coils'])} variables")
-    total_vars = (len(POWER_REGISTER_MAP['input_registers']) + 
-                  len(POWER_REGISTER_MAP['holding_registers']) +
-                  len(POWER_REGISTER_MAP['discrete_inputs']) + 
-                  len(POWER_REGISTER_MAP['coils']))
-    print(f"  - Total: {total_vars} power industry variables")
-    print("=" * 70)
-    print()
+    counts = {register_type: len(registers) for register_type, registers in POWER_REGISTER_MAP.items()}
+    lines = [
+        "=" * 70,
+        "POWER INDUSTRY IED SIMULATOR - Professional Edition v3.0",
+        "=" * 70,
+        f"Start Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"Modbus TCP: {SERVER_IP}:{SERVER_PORT} (Unit ID: {MODBUS_ADDRESS})",
+        f"Web Interface: http://0.0.0.0:{FLASK_PORT}",
+        f"Register Count: {REGISTER_COUNT} per type",
+        "-" * 70,
+        "Configured Power Industry Variables:",
+        f"  - Input Registers: {counts['input_registers']} variables",
+        f"  - Holding Registers: {counts['holding_registers']} variables",
+        f"  - Discrete Inputs: {counts['discrete_inputs']} variables",
+        f"  - Coils: {counts['coils']} variables",
+        f"  - Total: {sum(counts.values())} power industry variables",
+        "=" * 70,
+        "",
+    ]
+    # Emit the whole banner with one write and flush
+    print("\n".join(lines), flush=True)
 
 if __name__ == '__main__':
+    signal.signal(signal.SIGTERM, _handle_sigterm)
     print_startup_banner()
     
     # Start Modbus server in a separate thread
     modbus_thread = Thread(target=run_modbus_server, daemon=True)
     modbus_thread.start()
     
-    # Small delay to let Modbus server start
-    time.sleep(1)
+    # Wait until the Modbus server is actually listening rather than for a
+    # fixed delay; carry on with the web interface if it fails to come up
+    if not modbus_ready.wait(timeout=5):
+        print("[MODBUS] Server did not start listening; continuing with web interface only")
     
     # Start Flask web interface
     run_flask_app()